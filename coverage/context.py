@@ -3,6 +3,8 @@
 
 """Determine contexts for coverage.py"""
 
+import sys
+
 
 def combine_context_switchers(context_switchers):
     """Create a single context switcher from multiple switchers.
@@ -23,9 +25,11 @@ def combine_context_switchers(context_switchers):
     if len(context_switchers) == 1:
         return context_switchers[0]
 
-    def should_start_context(frame):
+    def should_start_context(frame, switchers=tuple(context_switchers)):
         """The combiner for multiple context switchers."""
-        for switcher in context_switchers:
+        # `switchers` is bound as a default argument so the loop iterates a
+        # tuple through a fast local instead of a closure cell.
+        for switcher in switchers:
             new_context = switcher(frame)
             if new_context is not None:
                 return new_context
@@ -34,58 +38,118 @@ def combine_context_switchers(context_switchers):
     return should_start_context
 
 
+# Whether a code object has a test-like name never changes, so decide it
+# once per code object instead of re-matching the name on every call.
+_is_test_name = {}
+
 def should_start_context_test_function(frame):
     """Is this frame calling a test_* function?"""
-    co_name = frame.f_code.co_name
-    if co_name.startswith("test") or co_name == "runTest":
+    co = frame.f_code
+    is_test = _is_test_name.get(co)
+    if is_test is None:
+        co_name = co.co_name
+        is_test = _is_test_name[co] = (co_name.startswith("test") or co_name == "runTest")
+    if is_test:
         return qualname_from_frame(frame)
     return None
 
+# The C tracer module has a faster implementation of the predicate, which
+# runs for every frame while a dynamic context is being sought.  Use it when
+# it's available.
+try:
+    from coverage.tracer import should_start_context_test_function
+except ImportError:
+    pass
+
+
+# Qualified names are expensive to compute, and are asked for over and over
+# for the same code objects.  Each code object is classified once, on first
+# sight, into a record in _code_info keyed on the code object itself:
+#
+#   ("qname", name): the name doesn't depend on the frame (a plain function,
+#       or a method resolved through its own __qualname__).  Repeat calls are
+#       a single dict hit, and never touch frame.f_locals, which CPython
+#       materializes into a fresh dict on every access.
+#
+#   ("method", {class: name}): the code takes `self`, and the name can
+#       depend on self's class, so names are memoized per class.
+#
+# A name of None (no qualname could be determined) is a cachable verdict
+# like any other: most frames aren't test functions, and re-deciding that
+# for every call would be the dominant cost.
+#
+# Code objects and classes are hashable and live for the duration of the
+# run, so they key the caches directly, with no id() or weakref
+# housekeeping, and the caches are bounded by the amount of code traced.
+_code_info = {}
+
+# Frame locals are always a real dict, so bind dict.get once instead of
+# constructing a bound method on each miss.  Frame globals aren't as
+# trustworthy: tests hand us mocked frames whose f_globals only quacks like
+# a dict, so those keep the duck-typed .get().
+_dict_get = dict.get
 
 def qualname_from_frame(frame):
     """Get a qualified name for the code running in `frame`."""
     co = frame.f_code
+    info = _code_info.get(co)
+    if info is None:
+        info = _register_code(frame, co)
+    if info[0] == "qname":
+        return info[1]
+
+    # A method: resolve the name against self's class, memoized per class.
+    # Nothing but f_code and the class is touched before the cache check.
+    self = _dict_get(frame.f_locals, "self")
+    per_class = info[1]
+    clskey = type(self)
+    try:
+        return per_class[clskey]
+    except KeyError:
+        pass
+
     fname = co.co_name
     method = None
-    if co.co_argcount and co.co_varnames[0] == "self":
-        self = frame.f_locals.get("self", None)
+    if self is not None:
         method = getattr(self, fname, None)
 
     if method is None:
         func = frame.f_globals.get(fname)
         if func is None:
-            return None
-        return func.__module__ + '.' + fname
+            qname = None
+        else:
+            qname = sys.intern(f"{func.__module__}.{fname}")
+        per_class[clskey] = qname
+        return qname
 
     func = getattr(method, '__func__', None)
     if func is None:
         cls = self.__class__
-        return cls.__module__ + '.' + cls.__name__ + "." + fname
+        qname = sys.intern(f"{cls.__module__}.{cls.__name__}.{fname}")
+        per_class[clskey] = qname
+        return qname
+
+    # Every function has __qualname__ on Python 3, and it knows its own
+    # name.  But getattr resolved the method through self's class, so an
+    # overriding subclass (reached via super(), say) answers with its own
+    # name for the base method's code: memoize per class, like the other
+    # outcomes.
+    qname = sys.intern(f"{func.__module__}.{func.__qualname__}")
+    per_class[clskey] = qname
+    return qname
 
-    if hasattr(func, '__qualname__'):
-        qname = func.__module__ + '.' + func.__qualname__
+
+def _register_code(frame, co):
+    """Classify `co` on first sight, returning its _code_info record."""
+    if co.co_argcount and co.co_varnames[0] == "self":
+        info = ("method", {})
     else:
-        for cls in getattr(self.__class__, '__mro__', ()):
-            f = cls.__dict__.get(fname, None)
-            if f is None:
-                continue
-            if f is func:
-                qname = cls.__module__ + '.' + cls.__name__ + "." + fname
-                break
+        fname = co.co_name
+        func = frame.f_globals.get(fname)
+        if func is None:
+            qname = None
         else:
-            # Support for old-style classes.
-            def mro(bases):
-                for base in bases:
-                    f = base.__dict__.get(fname, None)
-                    if f is func:
-                        return base.__module__ + '.' + base.__name__ + "." + fname
-                for base in bases:
-                    qname = mro(base.__bases__)
-                    if qname is not None:
-                        return qname
-                return None
-            qname = mro([self.__class__])
-            if qname is None:
-                qname = func.__module__ + '.' + fname
-
-    return qname
+            qname = sys.intern(f"{func.__module__}.{fname}")
+        info = ("qname", qname)
+    _code_info[co] = info
+    return info
@@ -5,6 +5,179 @@
 #include "tracer.h"
 #include "filedisp.h"
 
+/* Module functions */
+
+/* The Python qualname_from_frame, imported lazily on first use. */
+static PyObject * qualname_from_frame = NULL;
+
+/* A fast version of context.py's should_start_context_test_function.
+ *
+ * While looking for a dynamic context, this runs for every frame, and
+ * almost always answers None.  Examine the code name's characters directly
+ * so the no-match path creates no temporaries, and only call back into
+ * Python for the qualname when the name matches.
+ */
+static PyObject *
+should_start_context_test_function(PyObject *self, PyObject *frame)
+{
+    PyObject * co_name;
+    Py_ssize_t len;
+    BOOL is_test = FALSE;
+
+    if (!PyFrame_Check(frame)) {
+        PyErr_SetString(PyExc_TypeError, "should_start_context_test_function needs a frame");
+        return NULL;
+    }
+
+    co_name = MyFrame_GetCode((PyFrameObject *)frame)->co_name;
+    len = PyUnicode_GET_LENGTH(co_name);
+    if (len >= 4 &&
+        PyUnicode_READ_CHAR(co_name, 0) == 't' &&
+        PyUnicode_READ_CHAR(co_name, 1) == 'e' &&
+        PyUnicode_READ_CHAR(co_name, 2) == 's' &&
+        PyUnicode_READ_CHAR(co_name, 3) == 't') {
+        is_test = TRUE;
+    }
+    else if (len == 7 && PyUnicode_CompareWithASCIIString(co_name, "runTest") == 0) {
+        is_test = TRUE;
+    }
+
+    if (!is_test) {
+        Py_RETURN_NONE;
+    }
+
+    if (qualname_from_frame == NULL) {
+        PyObject * context_mod = PyImport_ImportModule("coverage.context");
+        if (context_mod == NULL) {
+            return NULL;
+        }
+        qualname_from_frame = PyObject_GetAttrString(context_mod, "qualname_from_frame");
+        Py_DECREF(context_mod);
+        if (qualname_from_frame == NULL) {
+            return NULL;
+        }
+    }
+
+    return PyObject_CallFunctionObjArgs(qualname_from_frame, frame, NULL);
+}
+
+/* Count the trailing zero bits of a non-zero 64-bit word. */
+#if defined(__GNUC__) || defined(__clang__)
+#define NUMBITS_CTZLL(x)    __builtin_ctzll(x)
+#else
+static int
+numbits_ctzll(uint64_t x)
+{
+    int n = 0;
+    while (!(x & 1)) {
+        x >>= 1;
+        n++;
+    }
+    return n;
+}
+#define NUMBITS_CTZLL(x)    numbits_ctzll(x)
+#endif
+
+/* A fast version of numbits.py's numbits_union_to_list.
+ *
+ * OR all the blobs together a byte at a time, then walk the accumulator
+ * 64 bits at a time, emitting a number per set bit.  This runs in
+ * O(bytes + set bits) instead of a Python-level loop over every bit
+ * position of every blob.
+ */
+static PyObject *
+numbits_union_to_list(PyObject *self, PyObject *numbits_list)
+{
+    PyObject * iter = NULL;
+    PyObject * item = NULL;
+    PyObject * result = NULL;
+    unsigned char * acc = NULL;
+    Py_ssize_t acc_len = 0;
+    Py_ssize_t i;
+
+    iter = PyObject_GetIter(numbits_list);
+    if (iter == NULL) {
+        goto error;
+    }
+
+    while ((item = PyIter_Next(iter)) != NULL) {
+        Py_buffer buf;
+        Py_ssize_t b;
+
+        if (PyObject_GetBuffer(item, &buf, PyBUF_SIMPLE) < 0) {
+            goto error;
+        }
+        if (buf.len > acc_len) {
+            unsigned char * new_acc = PyMem_Realloc(acc, buf.len);
+            if (new_acc == NULL) {
+                PyBuffer_Release(&buf);
+                PyErr_NoMemory();
+                goto error;
+            }
+            memset(new_acc + acc_len, 0, buf.len - acc_len);
+            acc = new_acc;
+            acc_len = buf.len;
+        }
+        for (b = 0; b < buf.len; b++) {
+            acc[b] |= ((unsigned char *)buf.buf)[b];
+        }
+        PyBuffer_Release(&buf);
+        Py_CLEAR(item);
+    }
+    if (PyErr_Occurred()) {
+        goto error;
+    }
+
+    result = PyList_New(0);
+    if (result == NULL) {
+        goto error;
+    }
+
+    for (i = 0; i < acc_len; i += 8) {
+        uint64_t word = 0;
+        Py_ssize_t j, nbytes;
+
+        nbytes = acc_len - i;
+        if (nbytes > 8) {
+            nbytes = 8;
+        }
+        /* Assemble the word explicitly so the bit order doesn't depend on
+         * the host's endianness or alignment rules. */
+        for (j = 0; j < nbytes; j++) {
+            word |= ((uint64_t)acc[i + j]) << (8 * j);
+        }
+        while (word != 0) {
+            PyObject * num = PyLong_FromSsize_t(i * 8 + NUMBITS_CTZLL(word));
+            if (num == NULL) {
+                Py_CLEAR(result);
+                goto error;
+            }
+            if (PyList_Append(result, num) < 0) {
+                Py_DECREF(num);
+                Py_CLEAR(result);
+                goto error;
+            }
+            Py_DECREF(num);
+            word &= word - 1;
+        }
+    }
+
+error:
+    PyMem_Free(acc);
+    Py_XDECREF(item);
+    Py_XDECREF(iter);
+    return result;
+}
+
+static PyMethodDef
+module_methods[] = {
+    { "should_start_context_test_function", should_start_context_test_function, METH_O,
+        PyDoc_STR("Is this frame calling a test_* function?") },
+    { "numbits_union_to_list", numbits_union_to_list, METH_O,
+        PyDoc_STR("Union a number of numbits, and convert the result to numbers.") },
+    { NULL, NULL, 0, NULL },
+};
+
 /* Module definition */
 
 #define MODULE_DOC PyDoc_STR("Fast coverage tracer.")
@@ -15,7 +188,7 @@ moduledef = {
     "coverage.tracer",
     MODULE_DOC,
     -1,
-    NULL,       /* methods */
+    module_methods,
     NULL,
     NULL,       /* traverse */
     NULL,       /* clear */
@@ -124,6 +124,9 @@ def combine_parallel_data(
             if not keep:
                 if data._debug.should('dataio'):
                     data._debug.write(f"Deleting combined data file {f!r}")
+                # Drop the connections update() left open, so the file can
+                # be deleted even on Windows.
+                new_data._reset()
                 file_be_gone(f)
 
     if strict and not files_combined:
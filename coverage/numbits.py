@@ -19,6 +19,12 @@ from itertools import zip_longest
 
 from coverage.misc import contract, new_contract
 
+# numpy is not a dependency, but pack bits with it when it's available.
+try:
+    import numpy
+except ImportError:         # pragma: not covered
+    numpy = None
+
 def _to_blob(b):
     """Convert a bytestring into a type SQLite will accept for a blob."""
     return b
@@ -41,6 +47,11 @@ def nums_to_numbits(nums):
     except ValueError:
         # nums was empty.
         return _to_blob(b'')
+    if numpy is not None:
+        arr = numpy.fromiter(nums, dtype=numpy.int64)
+        b = numpy.zeros(nbytes, dtype=numpy.uint8)
+        numpy.bitwise_or.at(b, arr >> 3, (1 << (arr & 7)).astype(numpy.uint8))
+        return _to_blob(b.tobytes())
     b = bytearray(nbytes)
     for num in nums:
         b[num//8] |= 1 << num % 8
@@ -61,14 +72,51 @@ def numbits_to_nums(numbits):
     this returns a string, a JSON-encoded list of ints.
 
     """
+    # Work 64 bits at a time, peeling off the lowest set bit with `w & -w`,
+    # so the loop runs once per set bit instead of once per bit position.
+    # Coverage bitmaps are mostly zeros, so this is much less work.
     nums = []
-    for byte_i, byte in enumerate(numbits):
-        for bit_i in range(8):
-            if (byte & (1 << bit_i)):
-                nums.append(byte_i * 8 + bit_i)
+    base = 0
+    for word_i in range(0, len(numbits), 8):
+        word = int.from_bytes(numbits[word_i:word_i + 8], "little")
+        while word:
+            low = word & -word
+            nums.append(base + low.bit_length() - 1)
+            word ^= low
+        base += 64
     return nums
 
 
+@contract(numbits_list='Iterable', returns='list[int]')
+def numbits_union_to_list(numbits_list):
+    """Union a number of numbits, and convert the result to numbers.
+
+    Arguments:
+        numbits_list: an iterable of binary blobs, the packed number sets.
+
+    Returns:
+        A sorted list of ints, the union of all the sets.
+    """
+    # OR the blobs together as single big ints: CPython does that in C a
+    # word at a time, so the union costs far less than per-byte Python
+    # loops, and only the final combined bitmap gets decoded.
+    acc = 0
+    nbytes = 0
+    for numbits in numbits_list:
+        if len(numbits) > nbytes:
+            nbytes = len(numbits)
+        acc |= int.from_bytes(numbits, "little")
+    return numbits_to_nums(acc.to_bytes(nbytes, "little"))
+
+# The C tracer module has a batch implementation that unions the blobs a
+# word at a time and enumerates the set bits with bit-scans.  Use it when
+# it's available.
+try:
+    from coverage.tracer import numbits_union_to_list
+except ImportError:         # pragma: not covered
+    pass
+
+
 @contract(numbits1='blob', numbits2='blob', returns='blob')
 def numbits_union(numbits1, numbits2):
     """Compute the union of two numbits.
@@ -10,7 +10,6 @@ import collections
 import datetime
 import functools
 import glob
-import itertools
 import os
 import re
 import sqlite3
@@ -22,11 +21,36 @@ from coverage.debug import NoDebugging, SimpleReprMixin, clipped_repr
 from coverage.exceptions import CoverageException
 from coverage.files import PathAliases
 from coverage.misc import contract, file_be_gone, filename_suffix, isolate_module
-from coverage.numbits import numbits_to_nums, numbits_union, nums_to_numbits
+from coverage.numbits import (
+    numbits_to_nums, numbits_union, numbits_union_to_list, nums_to_numbits,
+)
 from coverage.version import __version__
 
 os = isolate_module(os)
 
+# A counter bumped in the child after every fork.  Comparing an int
+# attribute against it tells CoverageData it has crossed a process
+# boundary without paying a getpid call per operation.  Python 3.6 has
+# os.fork but not os.register_at_fork, so there the token is the pid
+# itself, keeping the baseline getpid check.
+_process_generation = 0
+
+def _after_fork_in_child():
+    """Mark that we are now in a different process than we were."""
+    global _process_generation
+    _process_generation += 1
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+    def _process_token():
+        """A cheap token that changes when the process forks."""
+        return _process_generation
+else:
+    def _process_token():
+        """No fork hook on this Python, so the token is the pid."""
+        return os.getpid()
+
 # If you change the schema, increment the SCHEMA_VERSION, and update the
 # docs in docs/dbschema.rst also.
 
@@ -41,6 +65,13 @@ SCHEMA_VERSION = 7
 # 6: Key-value in meta.
 # 7: line_map -> line_bits
 
+# Indexing: every query we issue is served by the implicit indexes the
+# UNIQUE constraints below create — meta(key), file(path),
+# context(context), line_bits(file_id, context_id), and
+# arc(file_id, context_id, fromno, tono) — or by rowid lookups on the
+# primary keys.  Before adding an explicit index here, check that a query
+# actually needs it: each one slows the insert-heavy collection phase.
+
 SCHEMA = """\
 CREATE TABLE coverage_schema (
     -- One row, to record the version of the schema in this db.
@@ -103,6 +134,26 @@ CREATE TABLE tracer (
 );
 """
 
+# Arc inserts are issued as multi-row "values (?,?,?,?), (?,?,?,?), ..."
+# statements, so a bulk insert costs one VDBE dispatch per chunk instead of
+# one per row.  The chunk size keeps the bound-parameter count safely under
+# SQLite's traditional limit of 999.  The generated SQL is cached per row
+# count so the final partial chunk doesn't rebuild the string every call.
+_ARC_ROWS_PER_INSERT = 200
+
+_arc_insert_sqls = {}
+
+def _arc_insert_sql(nrows):
+    """Get the arc-insert statement for `nrows` rows."""
+    sql = _arc_insert_sqls.get(nrows)
+    if sql is None:
+        sql = _arc_insert_sqls[nrows] = (
+            "insert or ignore into arc (file_id, context_id, fromno, tono) values " +
+            ", ".join(["(?, ?, ?, ?)"] * nrows)
+        )
+    return sql
+
+
 class CoverageData(SimpleReprMixin):
     """Manages collected coverage data, including file storage.
 
@@ -211,7 +262,7 @@ class CoverageData(SimpleReprMixin):
         self._file_map = {}
         # Maps thread ids to SqliteDb objects.
         self._dbs = {}
-        self._pid = os.getpid()
+        self._process_token = _process_token()
         # Synchronize the operations used during collection.
         self._lock = threading.Lock()
 
@@ -236,6 +287,9 @@ class CoverageData(SimpleReprMixin):
 
     def _choose_filename(self):
         """Set self._filename based on inited attributes."""
+        # Tracks whether we know the file exists on disk, to save a stat
+        # syscall per _connect from a new thread.
+        self._db_file_exists = False
         if self._no_disk:
             self._filename = ":memory:"
         else:
@@ -305,19 +359,25 @@ class CoverageData(SimpleReprMixin):
                 self._has_lines = not self._has_arcs
 
             for path, file_id in db.execute("select path, id from file"):
-                self._file_map[path] = file_id
+                self._file_map[sys.intern(path)] = file_id
 
     def _connect(self):
         """Get the SqliteDb object to use."""
         if threading.get_ident() not in self._dbs:
-            if os.path.exists(self._filename):
+            if self._db_file_exists or os.path.exists(self._filename):
                 self._open_db()
             else:
                 self._create_db()
+            if not self._no_disk:
+                self._db_file_exists = True
         return self._dbs[threading.get_ident()]
 
     def __nonzero__(self):
-        if (threading.get_ident() not in self._dbs and not os.path.exists(self._filename)):
+        if (
+            threading.get_ident() not in self._dbs
+            and not self._db_file_exists
+            and not os.path.exists(self._filename)
+        ):
             return False
         try:
             with self._connect() as con:
@@ -349,7 +409,19 @@ class CoverageData(SimpleReprMixin):
         if self._debug.should('dataio'):
             self._debug.write(f"Dumping data from data file {self._filename!r}")
         with self._connect() as con:
-            return b'z' + zlib.compress(con.dump().encode("utf8"))
+            # Stream the dump statement-by-statement through an incremental
+            # compressor, instead of materializing the whole SQL text and
+            # compressing it in one go: peak memory stays at the size of one
+            # statement plus the compressed result.
+            # Compression level 3: a few percent larger than the default
+            # level, for roughly half the CPU time.
+            compressor = zlib.compressobj(3)
+            parts = [b'z']
+            for stmt in con.dump_iter():
+                parts.append(compressor.compress(stmt.encode("utf8")))
+                parts.append(compressor.compress(b"\n"))
+            parts.append(compressor.flush())
+            return b''.join(parts)
 
     @contract(data='bytes')
     def loads(self, data):
@@ -386,12 +458,37 @@ class CoverageData(SimpleReprMixin):
         If filename is not in the database yet, add it if `add` is True.
         If `add` is not True, return None.
         """
-        if filename not in self._file_map:
+        try:
+            return self._file_map[filename]
+        except KeyError:
             if add:
-                with self._connect() as con:
-                    cur = con.execute("insert or replace into file (path) values (?)", (filename,))
-                    self._file_map[filename] = cur.lastrowid
-        return self._file_map.get(filename)
+                return self._file_ids([filename], add=True).get(filename)
+            return None
+
+    def _file_ids(self, filenames, add=False):
+        """Get the file ids for `filenames`, as a dict mapping them to ids.
+
+        Any filenames not in the database yet are added in one batch if `add`
+        is True.  Filenames that end up with no id are omitted from the
+        result.
+        """
+        new = [f for f in filenames if f not in self._file_map]
+        if new and add:
+            with self._connect() as con:
+                con.executemany(
+                    "insert or ignore into file (path) values (?)",
+                    ((f,) for f in new),
+                )
+                # Read the ids back in one query per 500 files, instead of
+                # one statement per file.
+                for i in range(0, len(new), 500):
+                    clause, params = _padded_in("path", new[i:i + 500])
+                    for path, file_id in con.execute(
+                        "select path, id from file where " + clause,
+                        params,
+                    ):
+                        self._file_map[sys.intern(path)] = file_id
+        return {f: self._file_map[f] for f in filenames if f in self._file_map}
 
     def _context_id(self, context):
         """Get the id for a context."""
@@ -422,13 +519,15 @@ class CoverageData(SimpleReprMixin):
     def _set_context_id(self):
         """Use the _current_context to set _current_context_id."""
         context = self._current_context or ""
-        context_id = self._context_id(context)
-        if context_id is not None:
-            self._current_context_id = context_id
-        else:
-            with self._connect() as con:
-                cur = con.execute("insert into context (context) values (?)", (context,))
+        with self._connect() as con:
+            # Insert-or-ignore first: a new context (the common case when
+            # recording per-test contexts) costs one statement, and only an
+            # already-known context needs the follow-up select.
+            cur = con.execute("insert or ignore into context (context) values (?)", (context,))
+            if cur.rowcount:
                 self._current_context_id = cur.lastrowid
+            else:
+                self._current_context_id = self._context_id(context)
 
     def base_filename(self):
         """The base filename for storing data.
@@ -460,24 +559,44 @@ class CoverageData(SimpleReprMixin):
                 len(line_data), sum(len(lines) for lines in line_data.values())
             ))
         self._start_using()
-        self._choose_lines_or_arcs(lines=True)
-        if not line_data:
-            return
         with self._connect() as con:
+            # Choosing lines writes a meta row; doing it inside our
+            # connection block folds it into this transaction instead of
+            # committing it separately.
+            self._choose_lines_or_arcs(lines=True)
+            if not line_data:
+                return
             self._set_context_id()
+            context_id = self._current_context_id
+            file_ids = self._file_ids(line_data, add=True)
+
+            # Read all the existing numbits for this context in one query,
+            # merge in Python, then write everything back in one statement,
+            # instead of a select and an insert per file.
+            existing = {}
+            ids = list(file_ids.values())
+            for i in range(0, len(ids), 500):
+                clause, params = _padded_in("file_id", ids[i:i + 500])
+                existing.update(con.execute(
+                    "select file_id, numbits from line_bits" +
+                    " where context_id = ? and " + clause,
+                    [context_id] + params,
+                ))
+
+            rows = []
             for filename, linenos in line_data.items():
+                file_id = file_ids[filename]
                 linemap = nums_to_numbits(linenos)
-                file_id = self._file_id(filename, add=True)
-                query = "select numbits from line_bits where file_id = ? and context_id = ?"
-                existing = list(con.execute(query, (file_id, self._current_context_id)))
-                if existing:
-                    linemap = numbits_union(linemap, existing[0][0])
-
-                con.execute(
-                    "insert or replace into line_bits "
-                    " (file_id, context_id, numbits) values (?, ?, ?)",
-                    (file_id, self._current_context_id, linemap),
-                )
+                old_numbits = existing.get(file_id)
+                if old_numbits is not None:
+                    linemap = numbits_union(linemap, old_numbits)
+                rows.append((file_id, context_id, linemap))
+
+            con.executemany(
+                "insert or replace into line_bits "
+                " (file_id, context_id, numbits) values (?, ?, ?)",
+                rows,
+            )
 
     @_locked
     def add_arcs(self, arc_data):
@@ -493,18 +612,28 @@ class CoverageData(SimpleReprMixin):
                 len(arc_data), sum(len(arcs) for arcs in arc_data.values())
             ))
         self._start_using()
-        self._choose_lines_or_arcs(arcs=True)
-        if not arc_data:
-            return
         with self._connect() as con:
+            # As in add_lines, choose inside the connection block so the
+            # meta row commits with the data.
+            self._choose_lines_or_arcs(arcs=True)
+            if not arc_data:
+                return
             self._set_context_id()
-            for filename, arcs in arc_data.items():
-                file_id = self._file_id(filename, add=True)
-                data = [(file_id, self._current_context_id, fromno, tono) for fromno, tono in arcs]
-                con.executemany(
-                    "insert or ignore into arc "
-                    "(file_id, context_id, fromno, tono) values (?, ?, ?, ?)",
-                    data,
+            context_id = self._current_context_id
+            # Files with no arcs still get a file row: they were measured.
+            file_ids = self._file_ids(arc_data, add=True)
+            # The arcs arrive as dict keys, so they are already distinct per
+            # file, and file ids make them distinct across files.
+            data = [
+                (file_ids[filename], context_id, fromno, tono)
+                for filename, arcs in arc_data.items()
+                for fromno, tono in arcs
+            ]
+            for i in range(0, len(data), _ARC_ROWS_PER_INSERT):
+                rows = data[i:i + _ARC_ROWS_PER_INSERT]
+                con.execute(
+                    _arc_insert_sql(len(rows)),
+                    [value for row in rows for value in row],
                 )
 
     def _choose_lines_or_arcs(self, lines=False, arcs=False):
@@ -579,11 +708,12 @@ class CoverageData(SimpleReprMixin):
             if not self._has_arcs and not self._has_lines:
                 raise CoverageException("Can't touch files in an empty CoverageData")
 
-            for filename in filenames:
-                self._file_id(filename, add=True)
-                if plugin_name:
-                    # Set the tracer for this file
-                    self.add_file_tracers({filename: plugin_name})
+            filenames = list(filenames)
+            # Register all the files in one batch.
+            self._file_ids(filenames, add=True)
+            if plugin_name:
+                # Set the tracer for all the files in one call.
+                self.add_file_tracers({filename: plugin_name for filename in filenames})
 
     def update(self, other_data, aliases=None):
         """Update this data with data from several other :class:`CoverageData` instances.
@@ -619,15 +749,9 @@ class CoverageData(SimpleReprMixin):
             contexts = [context for (context,) in cur]
             cur.close()
 
-            # Get arc data.
-            cur = conn.execute(
-                'select file.path, context.context, arc.fromno, arc.tono '
-                'from arc '
-                'inner join file on file.id = arc.file_id '
-                'inner join context on context.id = arc.context_id'
-            )
-            arcs = [(files[path], context, fromno, tono) for (path, context, fromno, tono) in cur]
-            cur.close()
+            # Does the other data have arcs?  They are streamed across later,
+            # inside the write transaction.
+            other_has_arcs = conn.execute_one("select 1 from arc limit 1") is not None
 
             # Get line data.
             cur = conn.execute(
@@ -636,10 +760,15 @@ class CoverageData(SimpleReprMixin):
                 'inner join file on file.id = line_bits.file_id '
                 'inner join context on context.id = line_bits.context_id'
                 )
-            lines = {
-                (files[path], context): numbits
-                for (path, context, numbits) in cur
-                }
+            # Several distinct paths can alias to the same local path, so
+            # union the numbits per (path, context) key in a single pass
+            # instead of letting later rows silently replace earlier ones.
+            lines = {}
+            for path, context, numbits in cur:
+                key = (files[path], context)
+                if key in lines:
+                    numbits = numbits_union(lines[key], numbits)
+                lines[key] = numbits
             cur.close()
 
             # Get tracer data.
@@ -652,7 +781,10 @@ class CoverageData(SimpleReprMixin):
             cur.close()
 
         with self._connect() as conn:
-            conn.con.isolation_level = 'IMMEDIATE'
+            # Take the write lock up front and hold one transaction for the
+            # whole write phase: a single commit when the `with` block exits,
+            # instead of relying on the connection's isolation mode.
+            conn.execute("begin immediate")
 
             # Get all tracers in the DB. Files not in the tracers are assumed
             # to have an empty string tracer. Since Sqlite does not support
@@ -701,14 +833,6 @@ class CoverageData(SimpleReprMixin):
                     )
                 tracer_map[path] = other_tracer
 
-            # Prepare arc and line rows to be inserted by converting the file
-            # and context strings with integer ids. Then use the efficient
-            # `executemany()` to insert all rows at once.
-            arc_rows = (
-                (file_ids[file], context_ids[context], fromno, tono)
-                for file, context, fromno, tono in arcs
-            )
-
             # Get line data.
             cur = conn.execute(
                 'select file.path, context.context, line_bits.numbits '
@@ -723,15 +847,29 @@ class CoverageData(SimpleReprMixin):
                 lines[key] = numbits
             cur.close()
 
-            if arcs:
+            if other_has_arcs:
                 self._choose_lines_or_arcs(arcs=True)
 
-                # Write the combined data.
-                conn.executemany(
-                    'insert or ignore into arc '
-                    '(file_id, context_id, fromno, tono) values (?, ?, ?, ?)',
-                    arc_rows
-                )
+                # Stream the arcs from the other database directly into the
+                # destination insert, converting the file and context strings
+                # to integer ids on the way, without ever materializing a
+                # Python list of the arcs.
+                with other_data._connect() as other_conn:
+                    cur = other_conn.execute(
+                        'select file.path, context.context, arc.fromno, arc.tono '
+                        'from arc '
+                        'inner join file on file.id = arc.file_id '
+                        'inner join context on context.id = arc.context_id'
+                    )
+                    conn.executemany(
+                        'insert or ignore into arc '
+                        '(file_id, context_id, fromno, tono) values (?, ?, ?, ?)',
+                        (
+                            (file_ids[files[path]], context_ids[context], fromno, tono)
+                            for path, context, fromno, tono in cur
+                        ),
+                    )
+                    cur.close()
 
             if lines:
                 self._choose_lines_or_arcs(lines=True)
@@ -749,9 +887,12 @@ class CoverageData(SimpleReprMixin):
                 ((file_ids[filename], tracer) for filename, tracer in tracer_map.items())
             )
 
-        # Update all internal cache data.
-        self._reset()
-        self.read()
+        # Update all internal cache data.  `file_ids` already reflects the
+        # whole file table, so refresh the map from it instead of closing the
+        # connections and re-reading the database: combining many data files
+        # would make that re-read quadratic.
+        self._file_map.update(file_ids)
+        self._have_used = True
 
     def erase(self, parallel=False):
         """Erase the data in this object.
@@ -766,6 +907,7 @@ class CoverageData(SimpleReprMixin):
         if self._debug.should('dataio'):
             self._debug.write(f"Erasing data file {self._filename!r}")
         file_be_gone(self._filename)
+        self._db_file_exists = False
         if parallel:
             data_dir, local = os.path.split(self._filename)
             localdot = local + '.*'
@@ -786,11 +928,11 @@ class CoverageData(SimpleReprMixin):
 
     def _start_using(self):
         """Call this before using the database at all."""
-        if self._pid != os.getpid():
+        if self._process_token != _process_token():
             # Looks like we forked! Have to start a new data file.
             self._reset()
             self._choose_filename()
-            self._pid = os.getpid()
+            self._process_token = _process_token()
         if not self._have_used:
             self.erase()
         self._have_used = True
@@ -863,8 +1005,19 @@ class CoverageData(SimpleReprMixin):
         self._start_using()
         if contexts:
             with self._connect() as con:
-                context_clause = ' or '.join(['context regexp ?'] * len(contexts))
-                cur = con.execute("select id from context where " + context_clause, contexts)
+                clauses = []
+                for context in contexts:
+                    if re.escape(context) == context:
+                        # For a plain string, re.search means substring
+                        # containment, which instr can decide inside SQLite
+                        # without calling back into Python for every row.
+                        clauses.append('instr(context, ?) > 0')
+                    else:
+                        clauses.append('context regexp ?')
+                cur = con.execute(
+                    "select id from context where " + ' or '.join(clauses),
+                    list(contexts),
+                )
                 self._query_context_ids = [row[0] for row in cur.fetchall()]
         else:
             self._query_context_ids = None
@@ -881,27 +1034,25 @@ class CoverageData(SimpleReprMixin):
         """
         self._start_using()
         if self.has_arcs():
-            arcs = self.arcs(filename)
-            if arcs is not None:
-                all_lines = itertools.chain.from_iterable(arcs)
-                return list({l for l in all_lines if l > 0})
+            # Stream the arc rows straight into the set instead of building
+            # the full arc list just to tear it apart again.
+            with self._connect() as con:
+                file_id = self._file_id(filename)
+                if file_id is None:
+                    return None
+                return list({
+                    l for arc in self._arc_rows(con, file_id) for l in arc if l > 0
+                })
 
         with self._connect() as con:
             file_id = self._file_id(filename)
             if file_id is None:
                 return None
             else:
-                query = "select numbits from line_bits where file_id = ?"
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ', '.join('?' * len(self._query_context_ids))
-                    query += " and context_id in (" + ids_array + ")"
-                    data += self._query_context_ids
-                bitmaps = list(con.execute(query, data))
-                nums = set()
-                for row in bitmaps:
-                    nums.update(numbits_to_nums(row[0]))
-                return list(nums)
+                bitmaps = self._context_query(
+                    con, "select numbits from line_bits where file_id = ?", [file_id],
+                )
+                return numbits_union_to_list(row[0] for row in bitmaps)
 
     def arcs(self, filename):
         """Get the list of arcs executed for a file.
@@ -926,14 +1077,37 @@ class CoverageData(SimpleReprMixin):
             if file_id is None:
                 return None
             else:
-                query = "select distinct fromno, tono from arc where file_id = ?"
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ', '.join('?' * len(self._query_context_ids))
-                    query += " and context_id in (" + ids_array + ")"
-                    data += self._query_context_ids
-                arcs = con.execute(query, data)
-                return list(arcs)
+                return list(self._arc_rows(con, file_id))
+
+    def _arc_rows(self, con, file_id):
+        """Run the arc query for one file, returning an iterable of rows."""
+        rows = self._context_query(
+            con, "select distinct fromno, tono from arc where file_id = ?", [file_id],
+        )
+        if self._query_context_ids is not None and len(self._query_context_ids) > 500:
+            # The distinct is per chunk, so an arc measured under contexts
+            # in different chunks comes back more than once.
+            rows = iter(dict.fromkeys(rows))
+        return rows
+
+    def _context_query(self, con, query, data, column="context_id"):
+        """Run `query`, limited to the query contexts if they are set.
+
+        `query` must end with a where clause that `" and "` can extend.  The
+        context filter is issued in chunks of 500 ids, like _file_ids and
+        add_lines, so the bound-parameter count stays under SQLite's
+        traditional limit of 999 however many contexts match.  `column` is
+        the context-id column to constrain.
+
+        Yields the rows of all the executions.
+        """
+        if self._query_context_ids is None:
+            yield from con.execute(query, data)
+        else:
+            ids = self._query_context_ids
+            for i in range(0, len(ids), 500):
+                clause, params = _padded_in(column, ids[i:i + 500])
+                yield from con.execute(query + " and " + clause, data + params)
 
     def contexts_by_lineno(self, filename):
         """Get the contexts for each line in a file.
@@ -944,43 +1118,38 @@ class CoverageData(SimpleReprMixin):
         .. versionadded:: 5.0
 
         """
-        lineno_contexts_map = collections.defaultdict(list)
         self._start_using()
+        # Sets make adding a context O(1) no matter how many contexts a line
+        # already has; the lists-of-lists interface is preserved at the end.
+        lineno_contexts_map = collections.defaultdict(set)
         with self._connect() as con:
             file_id = self._file_id(filename)
             if file_id is None:
-                return lineno_contexts_map
+                return collections.defaultdict(list)
             if self.has_arcs():
                 query = (
-                    "select arc.fromno, arc.tono, context.context "
+                    "select distinct arc.fromno, arc.tono, context.context "
                     "from arc, context "
                     "where arc.file_id = ? and arc.context_id = context.id"
                 )
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ', '.join('?' * len(self._query_context_ids))
-                    query += " and arc.context_id in (" + ids_array + ")"
-                    data += self._query_context_ids
-                for fromno, tono, context in con.execute(query, data):
-                    if context not in lineno_contexts_map[fromno]:
-                        lineno_contexts_map[fromno].append(context)
-                    if context not in lineno_contexts_map[tono]:
-                        lineno_contexts_map[tono].append(context)
+                rows = self._context_query(con, query, [file_id], "arc.context_id")
+                for fromno, tono, context in rows:
+                    lineno_contexts_map[fromno].add(context)
+                    lineno_contexts_map[tono].add(context)
             else:
                 query = (
                     "select l.numbits, c.context from line_bits l, context c "
                     "where l.context_id = c.id "
                     "and file_id = ?"
                     )
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ', '.join('?' * len(self._query_context_ids))
-                    query += " and l.context_id in (" + ids_array + ")"
-                    data += self._query_context_ids
-                for numbits, context in con.execute(query, data):
+                rows = self._context_query(con, query, [file_id], "l.context_id")
+                for numbits, context in rows:
                     for lineno in numbits_to_nums(numbits):
-                        lineno_contexts_map[lineno].append(context)
-        return lineno_contexts_map
+                        lineno_contexts_map[lineno].add(context)
+        result = collections.defaultdict(list)
+        for lineno, contexts in lineno_contexts_map.items():
+            result[lineno] = sorted(contexts)
+        return result
 
     @classmethod
     def sys_info(cls):
@@ -989,12 +1158,10 @@ class CoverageData(SimpleReprMixin):
         Returns a list of (key, value) pairs.
 
         """
-        with SqliteDb(":memory:", debug=NoDebugging()) as db:
-            temp_store = [row[0] for row in db.execute("pragma temp_store")]
-            copts = [row[0] for row in db.execute("pragma compile_options")]
-            # Yes, this is overkill. I don't like the long list of options
-            # at the end of "debug sys", but I don't want to omit information.
-            copts = ["; ".join(copts[i:i + 3]) for i in range(0, len(copts), 3)]
+        temp_store, copts = _sqlite_info()
+        # Yes, this is overkill. I don't like the long list of options
+        # at the end of "debug sys", but I don't want to omit information.
+        copts = ["; ".join(copts[i:i + 3]) for i in range(0, len(copts), 3)]
 
         return [
             ('sqlite3_version', sqlite3.version),
@@ -1032,7 +1199,12 @@ class SqliteDb(SimpleReprMixin):
         # is not a problem.
         if self.debug:
             self.debug.write(f"Connecting to {self.filename!r}")
-        self.con = sqlite3.connect(self.filename, check_same_thread=False)
+        # A larger statement cache keeps all of our hot SQL compiled across
+        # the collection and combine phases, so repeated execute() calls
+        # reuse prepared statements instead of re-parsing.
+        self.con = sqlite3.connect(
+            self.filename, check_same_thread=False, cached_statements=256,
+        )
         self.con.create_function('REGEXP', 2, _regexp)
 
         # This pragma makes writing faster. It disables rollbacks, but we never need them.
@@ -1041,6 +1213,11 @@ class SqliteDb(SimpleReprMixin):
         self.execute("pragma journal_mode=off").close()
         # This pragma makes writing faster.
         self.execute("pragma synchronous=off").close()
+        # Keep temporary structures in memory, and give SQLite a 64MB page
+        # cache: the data file is written in bursts during collection, and
+        # re-read wholesale when combining.
+        self.execute("pragma temp_store=memory").close()
+        self.execute("pragma cache_size=-65536").close()
 
     def close(self):
         """If needed, close the connection."""
@@ -1059,8 +1236,12 @@ class SqliteDb(SimpleReprMixin):
         self.nest -= 1
         if self.nest == 0:
             try:
+                # End the transaction, but keep the connection: reporting
+                # calls us once per measured file, and reconnecting would
+                # re-apply the pragmas and empty the statement cache each
+                # time.  The connection closes in close(), called whenever
+                # CoverageData resets itself.
                 self.con.__exit__(exc_type, exc_value, traceback)
-                self.close()
             except Exception as exc:
                 if self.debug:
                     self.debug.write(f"EXCEPTION from __exit__: {exc}")
@@ -1106,13 +1287,13 @@ class SqliteDb(SimpleReprMixin):
 
         Returns a row, or None if there were no rows.
         """
-        rows = list(self.execute(sql, parameters))
-        if len(rows) == 0:
+        cur = self.execute(sql, parameters)
+        row = cur.fetchone()
+        if row is None:
             return None
-        elif len(rows) == 1:
-            return rows[0]
-        else:
-            raise CoverageException(f"Sql {sql!r} shouldn't return {len(rows)} rows")
+        if cur.fetchone() is not None:
+            raise CoverageException(f"Sql {sql!r} shouldn't return more than one row")
+        return row
 
     def executemany(self, sql, data):
         """Same as :meth:`python:sqlite3.Connection.executemany`."""
@@ -1135,11 +1316,59 @@ class SqliteDb(SimpleReprMixin):
             ))
         self.con.executescript(script)
 
+    def dump_iter(self):
+        """Yield the statements of the SQL dump of the database."""
+        return self.con.iterdump()
+
     def dump(self):
         """Return a multi-line string, the SQL dump of the database."""
-        return "\n".join(self.con.iterdump())
+        return "\n".join(self.dump_iter())
+
+
+@functools.lru_cache(maxsize=1)
+def _sqlite_info():
+    """Ask SQLite how it is configured, for sys_info.
+
+    The answers can't change while the process runs, so they are only
+    queried once, through a SqliteDb so they reflect the pragmas we set.
+    """
+    with SqliteDb(":memory:", debug=NoDebugging()) as db:
+        temp_store = [row[0] for row in db.execute("pragma temp_store")]
+        copts = [row[0] for row in db.execute("pragma compile_options")]
+    return temp_store, copts
+
+
+@functools.lru_cache(maxsize=64)
+def _in_clause(column, nparams):
+    """Return a "column in (?, ...)" clause with `nparams` placeholders."""
+    return column + " in (" + ", ".join("?" * nparams) + ")"
 
 
-def _regexp(text, pattern):
-    """A regexp function for SQLite."""
-    return re.search(text, pattern) is not None
+def _padded_in(column, values):
+    """Build a statement-cache-friendly IN clause for `values`.
+
+    Returns a (sql_clause, params) pair, with `params` padded out with
+    Nones to the next power of two.  The padding means only a handful of
+    distinct SQL strings are ever generated no matter how the number of
+    values varies, so sqlite3's statement cache keeps their plans prepared.
+    NULLs in an IN list never match anything.
+    """
+    nparams = 1
+    while nparams < len(values):
+        nparams <<= 1
+    return _in_clause(column, nparams), list(values) + [None] * (nparams - len(values))
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled_regex(regex):
+    """Compile a regex, caching the result across calls."""
+    return re.compile(regex)
+
+
+def _regexp(regex, text):
+    """A regexp function for SQLite.
+
+    SQLite calls this once per row, always with the same few patterns, so
+    use compiled regexes instead of re-matching through re.search each time.
+    """
+    return _compiled_regex(regex).search(text) is not None
@@ -217,6 +217,10 @@ class Parent:
 class Child(Parent):
     pass
 
+class OverridingChild(Parent):
+    def meth(self):
+        return super().meth()
+
 class SomethingElse:
     pass
 
@@ -255,6 +259,13 @@ class QualnameTest(CoverageTest):
     def test_mi_inherited_method(self):
         assert MultiChild().meth() == "tests.test_context.Parent.meth"
 
+    def test_overridden_method(self):
+        # Parent.meth's code runs for both calls, but must report each
+        # instance's own class: one class's answer can't be cached for the
+        # code object itself.
+        assert OverridingChild().meth() == "tests.test_context.OverridingChild.meth"
+        assert Parent().meth() == "tests.test_context.Parent.meth"
+
     def test_no_arguments(self):
         assert no_arguments() == "tests.test_context.no_arguments"
 
@@ -4,6 +4,7 @@
 """Tests for coverage.data"""
 
 import glob
+import json
 import os
 import os.path
 import re
@@ -18,6 +19,7 @@ from coverage.data import add_data_to_hash, line_counts
 from coverage.debug import DebugControlString
 from coverage.exceptions import CoverageException
 from coverage.files import PathAliases, canonical_filename
+from coverage.numbits import register_sqlite_functions
 
 from tests.coveragetest import CoverageTest
 from tests.helpers import assert_count_equal
@@ -189,6 +191,25 @@ class CoverageDataTest(DataTestHelpers, CoverageTest):
         covdata.set_query_contexts(['other*'])
         assert covdata.lines('a.py') == []
 
+    def test_set_query_contexts_matching_many(self):
+        # A filter matching more contexts than SQLite's bound-parameter
+        # limit must still work: the context clause is issued in chunks.
+        covdata = CoverageData()
+        for i in range(600):
+            covdata.set_context(f"ctx{i:03d}")
+            covdata.add_lines({'a.py': {i + 1: None}})
+        covdata.set_query_contexts(['ctx'])
+        assert covdata.lines('a.py') == list(range(1, 601))
+
+    def test_set_query_contexts_matching_many_arcs(self):
+        covdata = CoverageData()
+        for i in range(600):
+            covdata.set_context(f"ctx{i:03d}")
+            covdata.add_arcs({'x.py': {(i + 1, i + 2): None}})
+        covdata.set_query_contexts(['ctx'])
+        assert sorted(covdata.arcs('x.py')) == [(i + 1, i + 2) for i in range(600)]
+        assert covdata.lines('x.py') == list(range(1, 602))
+
     def test_no_lines_vs_unmeasured_file(self):
         covdata = CoverageData()
         covdata.add_lines(LINES_1)
@@ -517,6 +538,25 @@ class CoverageDataInTempDirTest(DataTestHelpers, CoverageTest):
         covdata2.read()
         self.assert_lines1_data(covdata2)
 
+    def test_read_sql_numbits_functions(self):
+        # docs/dbschema.rst promises that the numbits functions can be used
+        # in SQL directly against line_bits, so the blobs in the data file
+        # have to stay in the format those functions understand.
+        covdata = CoverageData("lines.dat")
+        covdata.add_lines(LINES_1)
+        covdata.write()
+
+        conn = sqlite3.connect("lines.dat")
+        register_sqlite_functions(conn)
+        rows = conn.execute(
+            "select file.path, numbits_to_nums(line_bits.numbits)"
+            " from line_bits, file"
+            " where line_bits.file_id = file.id"
+        )
+        lines = {path: json.loads(nums) for path, nums in rows}
+        conn.close()
+        assert lines == {'a.py': [1, 2], 'b.py': [3]}
+
     def test_read_write_arcs(self):
         covdata1 = CoverageData("arcs.dat")
         covdata1.add_arcs(ARCS_3)
@@ -11,8 +11,9 @@ from hypothesis.strategies import sets, integers
 
 from coverage import env
 from coverage.numbits import (
-    nums_to_numbits, numbits_to_nums, numbits_union, numbits_intersection,
-    numbits_any_intersection, num_in_numbits, register_sqlite_functions,
+    nums_to_numbits, numbits_to_nums, numbits_union, numbits_union_to_list,
+    numbits_intersection, numbits_any_intersection, num_in_numbits,
+    register_sqlite_functions,
     )
 
 from tests.coveragetest import CoverageTest
@@ -60,6 +61,14 @@ class NumbitsOpTest(CoverageTest):
         union = numbits_to_nums(nbu)
         assert nums1 | nums2 == set(union)
 
+    @given(line_number_sets, line_number_sets, line_number_sets)
+    @settings(default_settings)
+    def test_union_to_list(self, nums1, nums2, nums3):
+        numbits_list = [nums_to_numbits(nums) for nums in [nums1, nums2, nums3]]
+        union = numbits_union_to_list(numbits_list)
+        assert sorted(union) == union
+        assert nums1 | nums2 | nums3 == set(union)
+
     @given(line_number_sets, line_number_sets)
     @settings(default_settings)
     def test_intersection(self, nums1, nums2):